@@ -27,7 +27,6 @@ We support the following cluster syntax that includes optional deployments.
 """
 import logging
 import os
-import re
 import time
 
 from c4.utils.hjsonutil import HjsonSerializable
@@ -44,6 +43,11 @@ DEFAULT_IMAGE_ID = "centos-7.2"
 DEFAULT_NUMBER_OF_NODES = 3
 DEFAULT_RAM = 2048
 
+CLUSTER_KEYS = {"cpus", "disks", "imageId", "locationId", "name", "nodes", "ram"}
+DEPLOYMENTS_KEY = "deployments"
+
+_loginName = None
+
 @ClassLogger
 class ConfigurationInfo(HjsonSerializable, JSONSerializable):
     """
@@ -75,14 +79,63 @@ class ConfigurationInfo(HjsonSerializable, JSONSerializable):
         """
         deploymentInfos = None
         # check for deployment infos
-        deployments = re.search(r"^(?P<deployments>deployments\s*:.*)", hjsonString, re.MULTILINE | re.DOTALL)
-        if deployments:
-            deploymentInfos = DeploymentInfos.fromHjson(deployments.group("deployments"), objectHook=objectHook)
-            hjsonString = hjsonString.replace(deployments.group("deployments"), "")
+        deploymentsIndex = findDeploymentsSection(hjsonString)
+        if deploymentsIndex >= 0:
+            if findDeploymentsSection(hjsonString, deploymentsIndex + len(DEPLOYMENTS_KEY)) >= 0:
+                raise ValueError("Multiple deployments sections are not supported")
+            deploymentInfos = DeploymentInfos.fromHjson(hjsonString[deploymentsIndex:], objectHook=objectHook)
+            # deployments section runs until the end so we can simply cut it off
+            hjsonString = hjsonString[:deploymentsIndex]
 
         clusterInfo = ClusterInfo.fromHjson(hjsonString, objectHook=objectHook)
         return cls(clusterInfo, deploymentInfos=deploymentInfos)
 
+def getDefaultClusterName():
+    """
+    Get a default cluster name based on the login name of the user and
+    the current time. The login name is only looked up once.
+
+    :returns: cluster name
+    :rtype: str
+    """
+    global _loginName
+    if _loginName is None:
+        _loginName = os.getlogin()
+    return "{}-{}".format(_loginName, int(time.time()))
+
+def findDeploymentsSection(hjsonString, start=0):
+    """
+    Find the start of the deployments section, i.e., a line that starts
+    with ``deployments`` followed by optional whitespace and ``:``
+
+    :param hjsonString: a Hjson string
+    :type hjsonString: str
+    :param start: index to start searching from
+    :type start: int
+    :returns: index of the deployments section or ``-1`` if not found
+    :rtype: int
+    """
+    searchStart = start
+    while True:
+        if (hjsonString.startswith(DEPLOYMENTS_KEY, searchStart)
+                and (searchStart == 0 or hjsonString[searchStart-1] == "\n")):
+            index = searchStart
+        else:
+            index = hjsonString.find("\n" + DEPLOYMENTS_KEY, searchStart)
+            if index < 0:
+                return -1
+            # skip the newline
+            index += 1
+
+        # make sure the key is followed by optional whitespace and a colon
+        searchStart = index + len(DEPLOYMENTS_KEY)
+        position = searchStart
+        while position < len(hjsonString) and hjsonString[position].isspace():
+            position += 1
+        if position < len(hjsonString) and hjsonString[position] == ":":
+            return index
+
+@ClassLogger
 class ClusterInfo(HjsonSerializable, JSONSerializable):
     """
     Cluster information
@@ -113,7 +166,7 @@ class ClusterInfo(HjsonSerializable, JSONSerializable):
             numberOfNodes=DEFAULT_NUMBER_OF_NODES,
             ram=DEFAULT_RAM
         ):
-        self.name = name if name else "{}-{}".format(os.getlogin(), int(time.time()))
+        self.name = name if name else getDefaultClusterName()
         self.cpus = cpus
         # include the default OS disk in the size
         self.disks = [100] + disks if disks else [100]
@@ -151,7 +204,7 @@ class ClusterInfo(HjsonSerializable, JSONSerializable):
                 "disks": getTypedParameter(clusterInfoDict, "disks", [int]),
                 "imageId": getTypedParameter(clusterInfoDict, "imageId", str, default=DEFAULT_IMAGE_ID),
                 "locationId": getTypedParameter(clusterInfoDict, "locationId", str),
-                "name": getTypedParameter(clusterInfoDict, "name", str, default="{}-{}".format(os.getlogin(), int(time.time()))),
+                "name": getTypedParameter(clusterInfoDict, "name", str),
                 "ram": getTypedParameter(clusterInfoDict, "ram", int, default=DEFAULT_RAM)
             }
 
@@ -166,8 +219,9 @@ class ClusterInfo(HjsonSerializable, JSONSerializable):
                 else:
                     clusterParameters["numberOfNodes"] = getTypedParameter(clusterInfoDict, "nodes", int)
 
-            for key, value in clusterInfoDict.items():
-                cls.log.warn("Key '%s' with value '%s' is not a valid cluster config parameter", key, value)
+            unknownKeys = set(clusterInfoDict.keys()) - CLUSTER_KEYS
+            if unknownKeys:
+                cls.log.warn("Keys '%s' are not valid cluster config parameters", ",".join(sorted(unknownKeys)))
 
             return cls(**clusterParameters)
         return hjsonDict
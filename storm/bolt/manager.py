@@ -10,36 +10,107 @@ This utility provides functionality to provision and configure clusters
 from __future__ import print_function
 
 import argparse
+import collections
+import csv
+import importlib
+import json
 import logging
+from multiprocessing.pool import ThreadPool
 import os
+import re
+import select
+import shutil
+import socket
 import sys
-
-from libcloud.compute.base import NodeDriver
-from libcloud.compute.providers import get_driver
-from prettytable import PrettyTable
+import tempfile
+import threading
+import time
 
 from c4.utils.logutil import ClassLogger
-from c4.utils.util import getModuleClasses
 
-from .configuration import (ConfigurationInfo, ClusterInfo)
-from storm.thunder import (NodesInfoMap,
-                           deploy)
-from storm.thunder.manager import getDeploymentSections
+import storm
 
 
 log = logging.getLogger(__name__)
 
+CACHE_TIMEOUT = 30
+DRIVERS_CACHE_FILE = os.path.expanduser("~/.cache/storm-bolt/drivers.json")
+MAX_WORKERS = 16
+TABLE_PAGE_SIZE = 500
+
+# logger levels by verbosity, higher verbosities use the last entry
+VERBOSITY_LEVELS = [
+    {
+        "": logging.ERROR,
+        "storm": logging.INFO,
+        "storm.thunder.client.AdvancedSSHClient": logging.INFO,
+        "c4.utils": logging.INFO,
+        "paramiko": logging.ERROR,
+        "requests": logging.ERROR
+    },
+    {
+        "": logging.ERROR,
+        "storm": logging.DEBUG,
+        "storm.thunder.client.AdvancedSSHClient": logging.INFO,
+        "c4.utils": logging.INFO,
+        "paramiko": logging.ERROR,
+        "requests": logging.ERROR
+    },
+    {
+        "": logging.ERROR,
+        "storm": logging.DEBUG,
+        "storm.thunder.client.AdvancedSSHClient": logging.DEBUG,
+        "c4.utils": logging.DEBUG,
+        "paramiko": logging.ERROR,
+        "requests": logging.ERROR
+    },
+    {
+        "": logging.INFO,
+        "storm": logging.DEBUG,
+        "storm.thunder.client.AdvancedSSHClient": logging.DEBUG,
+        "c4.utils": logging.DEBUG,
+        "paramiko": logging.ERROR,
+        "requests": logging.ERROR
+    },
+    {
+        "": logging.DEBUG,
+        "storm": logging.DEBUG,
+        "storm.thunder.client.AdvancedSSHClient": logging.DEBUG,
+        "c4.utils": logging.DEBUG,
+        "paramiko": logging.INFO,
+        "requests": logging.INFO
+    },
+    {
+        "": logging.DEBUG,
+        "storm": logging.DEBUG,
+        "storm.thunder.client.AdvancedSSHClient": logging.DEBUG,
+        "c4.utils": logging.DEBUG,
+        "paramiko": logging.DEBUG,
+        "requests": logging.DEBUG
+    }
+]
+
 @ClassLogger
 class Bolt(object):
     """
     A cloud manager implementation that utilizes the specified driver
     to create, manage and destroy clusters and nodes.
 
+    Results of driver list calls are cached for :py:data:`CACHE_TIMEOUT`
+    seconds and invalidated when clusters or nodes are created or destroyed.
+
+    The driver connection is made reusable and per thread, see
+    :func:`enableConnectionReuse`. Independent driver calls are only
+    issued concurrently if this succeeded, since threads must not share
+    a single underlying connection.
+
     :param driver: driver
     :type driver: :class:`~libcloud.compute.base.NodeDriver`
     """
     def __init__(self, driver):
         self.driver = driver
+        self.cache = {}
+        self.concurrentRequests = enableConnectionReuse(driver)
 
     def createCluster(
             self,
@@ -57,6 +128,14 @@ class Bolt(object):
         Create a new cluster. All nodes in this cluster will be started
         automatically.
 
+        If the driver provides ``ex_bulk_create_nodes`` it is used instead of
+        ``ex_create_cluster`` to create all nodes with a single request. It
+        must have the same signature as ``ex_create_cluster``, i.e., accept the
+        ``cluster``, ``image``, ``location``, ``names`` and ``size`` keyword
+        arguments, and likewise return the created cluster whose ``nodes``
+        attribute maps node names to :class:`~libcloud.compute.base.Node`.
+        If it returns something else the created cluster is looked up by name.
+
         :param cluster: cluster name
         :type cluster: str
         :param clusterInfo: cluster info
@@ -76,6 +155,8 @@ class Bolt(object):
         :param ram: ram in MB per node
         :type ram: int
         """
+        from .configuration import ClusterInfo
+
         # use cluster info object as base and then overwrite with parameters
         if not clusterInfo:
             clusterInfo = ClusterInfo()
@@ -92,20 +173,17 @@ class Bolt(object):
 
         if imageId:
             clusterInfo.image = imageId
-        image = self.driver.get_image(clusterInfo.image)
+        image = self.getImage(clusterInfo.image)
         if not image:
-            log.error("Could not find image with id '%s'", imageId)
+            log.error("Could not find image with id '%s'", clusterInfo.image)
             return None
         self.log.info("Using image '%s'", image.name)
 
         if locationId:
             clusterInfo.location = locationId
-        location = None
-        for availableLocation in self.driver.list_locations():
-            if availableLocation.id == clusterInfo.location:
-                location = availableLocation
+        location = self.getLocation(clusterInfo.location)
         if not location:
-            log.error("Could not find location with id '%s'", locationId)
+            log.error("Could not find location with id '%s'", clusterInfo.location)
             return None
         self.log.info("Using location '%s'", location.name)
 
@@ -118,18 +196,25 @@ class Bolt(object):
                 for i in range(numberOfNodes)
             ]
             clusterInfo.numberOfNodes = numberOfNodes
-        self.log.info("Using node names '%s'", ",".join(clusterInfo.nodes))
+        if self.log.isEnabledFor(logging.INFO):
+            self.log.info("Using node names '%s'", ",".join(clusterInfo.nodes))
 
         if ram:
             clusterInfo.ram = ram
-        size = self.driver.ex_get_size_by_attributes(clusterInfo.cpus, clusterInfo.ram, clusterInfo.disks)
+        size = self.getSize(clusterInfo.cpus, clusterInfo.ram, clusterInfo.disks)
         if not size:
             log.error("Could not find size with '%d' cpus, '%d' ram and '%s' disks",
-                      cpus, ram, ",".join(str(capacity for capacity in disks)))
+                      clusterInfo.cpus, clusterInfo.ram, ",".join(map(str, clusterInfo.disks)))
             return None
         self.log.info("Using size '%s'", size.name)
 
-        createdCluster = self.driver.ex_create_cluster(
+        # prefer creating all nodes with a single request if the driver supports it
+        bulkCreateNodes = getattr(self.driver, "ex_bulk_create_nodes", None)
+        if callable(bulkCreateNodes):
+            createCluster = bulkCreateNodes
+        else:
+            createCluster = self.driver.ex_create_cluster
+        createdCluster = createCluster(
             cluster=clusterInfo.name,
             image=image,
             location=location,
@@ -137,9 +222,21 @@ class Bolt(object):
             size=size
         )
 
+        self.invalidateCache("clusters", "nodes")
+        if (createCluster is bulkCreateNodes
+                and createdCluster
+                and not hasattr(getattr(createdCluster, "nodes", None), "values")):
+            # nodes have been created, so look up the cluster instead of hiding them
+            log.warning("Driver '%s' returned '%s' instead of a cluster with nodes from 'ex_bulk_create_nodes'",
+                        self.driver.type, createdCluster)
+            createdCluster = self.getClustersByName(clusterInfo.name).get(clusterInfo.name)
+            if not createdCluster:
+                log.error("Could not find created cluster '%s' with nodes '%s', please check the '%s' driver",
+                          clusterInfo.name, ",".join(clusterInfo.nodes), self.driver.type)
+                return None
         if createdCluster:
             self.log.debug("Cleaning up 'known_hosts' file")
-            cleanupKnownHosts(createdCluster.nodes.values())
+            cleanupKnownHosts(getPublicIpAddresses(createdCluster.nodes.values()))
 
         return createdCluster
 
@@ -152,25 +249,38 @@ class Bolt(object):
         :returns: `True` if successful, `False` otherwise
         :rtype: bool
         """
-        clusters = self.driver.ex_list_clusters()
-        clusterMap = {
-            cluster.name: cluster
-            for cluster in clusters
-        }
-        destroyClusters = []
-        for clusterName in clusterNames:
-            if clusterName in clusterMap:
-                destroyClusters.append(clusterMap[clusterName])
-            else:
+        clustersByName = self.getClustersByName(*clusterNames)
+        destroyClusters = list(clustersByName.values())
+        missingClusterNames = set(clusterNames) - set(clustersByName.keys())
+        if missingClusterNames:
+            for clusterName in sorted(missingClusterNames):
                 log.error("Could not find cluster with name '%s'", clusterName)
-                return False
+            return False
 
-        successful = False
-        for cluster in destroyClusters:
-            successful = cluster.destroy()
-            cleanupKnownHosts(cluster.nodes.values())
+        def destroy(cluster):
+            # make sure that a failing cluster does not prevent clean up for the others
+            try:
+                return cluster.destroy()
+            except Exception as exception:
+                log.error("Could not destroy cluster '%s': %s", cluster.name, exception)
+                return False
 
-        return successful
+        results = self.mapRequests(destroy, destroyClusters)
+        self.invalidateCache("clusters", "nodes")
+        cleanupKnownHosts(getPublicIpAddresses(
+            node
+            for cluster in destroyClusters
+            for node in cluster.nodes.values()
+        ))
+
+        failedClusterNames = sorted(
+            cluster.name
+            for cluster, successful in zip(destroyClusters, results)
+            if not successful
+        )
+        if failedClusterNames:
+            log.error("Could not destroy clusters '%s'", ",".join(failedClusterNames))
+        return not failedClusterNames
 
     def destroyNode(self, *nodeNames):
         """
@@ -181,60 +291,239 @@ class Bolt(object):
         :returns: `True` if successful, `False` otherwise
         :rtype: bool
         """
-        nodes = self.driver.list_nodes()
-        nodesMap = {
-            node.name: node
-            for node in nodes
-        }
-        destroyNodes = []
-        for nodeName in nodeNames:
-            if nodeName in nodesMap:
-                destroyNodes.append(nodesMap[nodeName])
-            else:
+        nodesByName = self.getNodesByName(*nodeNames)
+        destroyNodes = list(nodesByName.values())
+        missingNodeNames = set(nodeNames) - set(nodesByName.keys())
+        if missingNodeNames:
+            for nodeName in sorted(missingNodeNames):
                 log.error("Could not find node with name '%s'", nodeName)
+            return False
+
+        def destroy(node):
+            # make sure that a failing node does not prevent clean up for the others
+            try:
+                return self.driver.destroy_node(node)
+            except Exception as exception:
+                log.error("Could not destroy node '%s': %s", node.name, exception)
                 return False
 
-        return all(
-            self.driver.destroy_node(node)
-            for node in destroyNodes
+        results = self.mapRequests(destroy, destroyNodes)
+        self.invalidateCache("clusters", "nodes")
+
+        failedNodeNames = sorted(
+            node.name
+            for node, successful in zip(destroyNodes, results)
+            if not successful
         )
+        if failedNodeNames:
+            log.error("Could not destroy nodes '%s'", ",".join(failedNodeNames))
+        return not failedNodeNames
 
-    def listClusters(self):
+    def mapRequests(self, function, items):
+        """
+        Apply the function, which issues driver requests, to each of the items.
+        This is done concurrently if the driver uses per thread connections
+        and sequentially otherwise.
+
+        :param function: function
+        :type function: func
+        :param items: items
+        :type items: []
+        :returns: results in the order of the items
+        :rtype: []
+        """
+        if self.concurrentRequests:
+            return mapConcurrently(function, items)
+        return [function(item) for item in items]
+
+    def getCached(self, key, function):
+        """
+        Get the cached result for the specified key or call the function
+        and cache its result if there is no entry or it is older than
+        :py:data:`CACHE_TIMEOUT` seconds
+
+        :param key: cache key
+        :type key: str
+        :param function: function without arguments that provides the value
+        :type function: func
+        :returns: cached value
+        """
+        now = time.time()
+        entry = self.cache.get(key)
+        if entry is None or now - entry[0] > CACHE_TIMEOUT:
+            entry = (now, function())
+            self.cache[key] = entry
+        return entry[1]
+
+    def invalidateCache(self, *keys):
+        """
+        Remove the specified keys from the cache
+
+        :param keys: cache keys. If none are specified the whole cache is cleared
+        :type keys: [str]
+        """
+        if not keys:
+            self.cache.clear()
+        for key in keys:
+            self.cache.pop(key, None)
+
+    def getClusters(self):
+        """
+        Get clusters
+
+        :returns: clusters
+        :rtype: []
+        """
+        return self.getCached("clusters", self.driver.ex_list_clusters)
+
+    def getClustersByName(self, *clusterNames):
+        """
+        Get the clusters with the specified names
+
+        :param clusterNames: cluster names
+        :type clusterNames: []
+        :returns: mapping of name to cluster for the clusters found
+        :rtype: dict
+        """
+        return findByName(self.getClusters(), clusterNames)
+
+    def getImage(self, imageId):
+        """
+        Get image with the specified id
+
+        :param imageId: image id
+        :type imageId: str
+        :returns: image
+        :rtype: :class:`~libcloud.compute.base.NodeImage`
+        """
+        return self.getCached("image-{}".format(imageId), lambda: self.driver.get_image(imageId))
+
+    def getImages(self):
+        """
+        Get images
+
+        :returns: images
+        :rtype: [:class:`~libcloud.compute.base.NodeImage`]
+        """
+        return self.getCached("images", self.driver.list_images)
+
+    def getLocation(self, locationId):
+        """
+        Get location with the specified id
+
+        :param locationId: location id
+        :type locationId: str
+        :returns: location or ``None`` if not found
+        :rtype: :class:`~libcloud.compute.base.NodeLocation`
+        """
+        locationsById = self.getCached("locationsById", lambda: {
+            location.id: location
+            for location in self.getLocations()
+        })
+        return locationsById.get(locationId)
+
+    def getLocations(self):
+        """
+        Get locations
+
+        :returns: locations
+        :rtype: [:class:`~libcloud.compute.base.NodeLocation`]
+        """
+        return self.getCached("locations", self.driver.list_locations)
+
+    def getNodes(self):
+        """
+        Get nodes
+
+        :returns: nodes
+        :rtype: [:class:`~libcloud.compute.base.Node`]
+        """
+        return self.getCached("nodes", self.driver.list_nodes)
+
+    def getNodesByName(self, *nodeNames):
+        """
+        Get the nodes with the specified names
+
+        :param nodeNames: node names
+        :type nodeNames: []
+        :returns: mapping of name to node for the nodes found
+        :rtype: dict
+        """
+        return findByName(self.getNodes(), nodeNames)
+
+    def getSize(self, cpus, ram, disks):
+        """
+        Get size with the specified attributes
+
+        :param cpus: number of cpus
+        :type cpus: int
+        :param ram: ram in MB
+        :type ram: int
+        :param disks: list of disks capacities in GB
+        :type disks: list
+        :returns: size or ``None`` if not found
+        :rtype: :class:`~libcloud.compute.base.NodeSize`
+        """
+        return self.getCached(
+            "size-{}-{}-{}".format(cpus, ram, ",".join(map(str, disks))),
+            lambda: self.driver.ex_get_size_by_attributes(cpus, ram, disks)
+        )
+
+    def getSizes(self):
+        """
+        Get sizes
+
+        :returns: sizes
+        :rtype: [:class:`~libcloud.compute.base.NodeSize`]
+        """
+        return self.getCached("sizes", self.driver.list_sizes)
+
+    def listClusters(self, outputFormat="table"):
         """
         List clusters
+
+        :param outputFormat: output format
+        :type outputFormat: str
         """
         # TODO: add cluster name to extra portion of the nodes
-        clusters = self.driver.ex_list_clusters()
-        table = PrettyTable(["name", "nodes"])
-        for cluster in clusters:
-            table.add_row([cluster.name,
-                           ",".join(sorted(cluster.nodes.keys()))])
-        print(table)
+        clusters = self.getClusters()
+        rows = (
+            [cluster.name, ",".join(sorted(cluster.nodes.keys()))]
+            for cluster in clusters
+        )
+        printRows(["name", "nodes"], rows, outputFormat=outputFormat)
 
-    def listImages(self):
+    def listImages(self, outputFormat="table"):
         """
         List images
+
+        :param outputFormat: output format
+        :type outputFormat: str
         """
-        images = self.driver.list_images()
-        table = PrettyTable(["id", "name"])
-        for image in images:
-            table.add_row([image.id, image.name])
-        print(table)
+        images = self.getImages()
+        rows = (
+            [image.id, image.name]
+            for image in images
+        )
+        printRows(["id", "name"], rows, outputFormat=outputFormat)
 
-    def listLocations(self):
+    def listLocations(self, outputFormat="table"):
         """
         List locations
+
+        :param outputFormat: output format
+        :type outputFormat: str
         """
-        locations = self.driver.list_locations()
-        table = PrettyTable(["id", "name", "long name", "city", "country"])
-        for location in locations:
-            table.add_row([location.id,
-                           location.name,
-                           location.extra.get("longName", "") if hasattr(location, "extra") else "",
-                           location.extra.get("city", "") if hasattr(location, "extra") else "",
-                           location.country
-                          ])
-        print(table)
+        locations = self.getLocations()
+        def getRows():
+            for location in locations:
+                extra = getattr(location, "extra", None) or {}
+                yield [location.id,
+                       location.name,
+                       extra.get("longName", ""),
+                       extra.get("city", ""),
+                       location.country]
+        printRows(["id", "name", "long name", "city", "country"], getRows(), outputFormat=outputFormat)
 
     def listNodes(self, includePasswords=False, nodeFilter=None, outputFormat="table"):
         """
@@ -247,13 +536,16 @@ class Bolt(object):
         :param outputFormat: output format
         :type outputFormat: str
         """
-        nodes = self.driver.list_nodes()
+        from storm.thunder import NodesInfoMap
+
+        nodes = self.getNodes()
         if nodeFilter:
+            # match all name prefixes at once using a single anchored alternation
+            nodeFilterRegex = re.compile("|".join(re.escape(nodeNameFilter) for nodeNameFilter in nodeFilter))
             filteredNodes = [
                 node
                 for node in nodes
-                if any(node.name.startswith(nodeNameFilter)
-                       for nodeNameFilter in nodeFilter)
+                if nodeFilterRegex.match(node.name)
             ]
             nodes = filteredNodes
 
@@ -261,101 +553,411 @@ class Bolt(object):
             # create nodes information
             nodesInformation = NodesInfoMap()
             nodesInformation.addNodes(nodes)
-            print(nodesInformation.toJSON(includeClassInfo=True, pretty=True))
+            # only pretty print for humans, compact output is smaller and faster to produce for pipelines
+            print(nodesInformation.toJSON(includeClassInfo=True, pretty=sys.stdout.isatty()))
 
         else:
-            fieldNames = ["id", "name", "public ip", "private ip", "password", 'state', 'disks']
-            fields = fieldNames[:]
             # only show passwords if specifically requested
-            if not includePasswords:
-                fields.remove("password")
-            table = PrettyTable(field_names=fieldNames, fields=fields)
-            for node in nodes:
-                table.add_row([node.id,
-                               node.name,
-                               node.public_ips[0] if node.public_ips else "",
-                               node.private_ips[0] if node.private_ips else "",
-                               node.extra.get("password", "unknown"),
-                               node.state,
-                               ",".join(str(capacity) for capacity in node.size.diskCapacities)])
-            print(table)
-
-    def listSizes(self, includeExtras=False):
+            fieldNames = (["id", "name", "public ip", "private ip"] +
+                          (["password"] if includePasswords else []) +
+                          ["state", "disks"])
+            def getRows():
+                for node in nodes:
+                    row = [node.id,
+                           node.name,
+                           node.public_ips[0] if node.public_ips else "",
+                           node.private_ips[0] if node.private_ips else ""]
+                    if includePasswords:
+                        row.append((node.extra or {}).get("password", "unknown"))
+                    row.append(node.state)
+                    row.append(",".join(map(str, node.size.diskCapacities)))
+                    yield row
+            printRows(fieldNames, getRows(), outputFormat=outputFormat)
+
+    def listSizes(self, includeExtras=False, outputFormat="table"):
         """
         List sizes
 
         :param includeExtras: include extra information in output
         :type includeExtras: bool
+        :param outputFormat: output format
+        :type outputFormat: str
         """
-        sizes = self.driver.list_sizes()
-        fieldNames = ["id", "name", "cpu", "ram", "disks", "extras"]
-        fields = fieldNames[:]
+        sizes = self.getSizes()
         # only show extras if specifically requested
-        if not includeExtras:
-            fields.remove("extras")
-        table = PrettyTable(field_names=fieldNames, fields=fields)
-        for size in sizes:
-            table.add_row([size.id,
-                           size.name,
-                           size.cpu,
-                           size.ram,
-                           size.diskCapacities,
-                           size.extra])
-        print(table)
-
-def cleanupKnownHosts(nodes):
+        fieldNames = ["id", "name", "cpu", "ram", "disks"] + (["extras"] if includeExtras else [])
+        rows = (
+            [size.id,
+             size.name,
+             size.cpu,
+             size.ram,
+             size.diskCapacities
+            ] + ([size.extra] if includeExtras else [])
+            for size in sizes
+        )
+        printRows(fieldNames, rows, outputFormat=outputFormat)
+
+def cleanupKnownHosts(ipAddresses):
     """
-    Remove node ip addresses of the cluster from the `known_hosts` file to avoid
+    Remove node ip addresses from the `known_hosts` file to avoid
     conflicting host keys on subsequent deployments
 
-    :param nodes: list of nodes
+    :param ipAddresses: ip addresses
+    :type ipAddresses: set
+    """
+    if not ipAddresses:
+        return
+
+    # resolve symlinks so that the actual file gets replaced instead of the link
+    knownHostsFileName = os.path.realpath(os.path.expanduser("~/.ssh/known_hosts"))
+    # write entries to a temporary file first and then replace the original
+    # file so that it never ends up truncated if something goes wrong
+    temporaryFile = tempfile.NamedTemporaryFile(mode="w",
+                                                dir=os.path.dirname(knownHostsFileName),
+                                                prefix=".known_hosts",
+                                                delete=False)
+    try:
+        with temporaryFile, open(knownHostsFileName) as knownHostsFile:
+            for entry in knownHostsFile:
+                # only keep the known hosts entries that are not part of the cluster
+                if entry.strip() and not ipAddresses.intersection(getKnownHostsEntryHosts(entry)):
+                    temporaryFile.write(entry if entry.endswith("\n") else entry + "\n")
+        shutil.copymode(knownHostsFileName, temporaryFile.name)
+        # note that rename atomically replaces the existing file on POSIX systems
+        os.rename(temporaryFile.name, knownHostsFileName)
+    except Exception:
+        os.remove(temporaryFile.name)
+        raise
+
+def getPublicIpAddresses(nodes):
+    """
+    Get the (first) public ip addresses of the specified nodes
+
+    :param nodes: nodes
     :type nodes: [:class:`~libcloud.compute.base.Node`]
+    :returns: ip addresses
+    :rtype: set
     """
-    # parse existing entries
-    knownHostsEntries = []
-    parsed = False
-    with open(os.path.expanduser("~/.ssh/known_hosts")) as knownHostsFile:
-        knownHosts = knownHostsFile.read()
-        for entry in knownHosts.splitlines():
-            # only keep the known hosts entries that are not part of the cluster
-            if entry and not any([
-                node.public_ips[0] in entry
-                for node in nodes
-            ]): knownHostsEntries.append(entry)
-        parsed = True
+    return {
+        node.public_ips[0]
+        for node in nodes
+        if node.public_ips
+    }
 
-    # rewrite file only if parsing was successful
-    if parsed:
-        with open(os.path.expanduser("~/.ssh/known_hosts"), "w") as knownHostsFile:
-            knownHostsFile.write("\n".join(knownHostsEntries))
-            knownHostsFile.write("\n")
+def getKnownHostsEntryHosts(entry):
+    """
+    Get the host names and addresses of a `known_hosts` entry
 
-def main():
+    :param entry: `known_hosts` line
+    :type entry: str
+    :returns: host names and addresses
+    :rtype: [str]
     """
-    Main function of the cloud tooling setup
+    fields = entry.split()
+    # skip optional marker such as @cert-authority or @revoked
+    if fields and fields[0].startswith("@"):
+        fields = fields[1:]
+    if not fields:
+        return []
+    hosts = []
+    for host in fields[0].split(","):
+        # non-standard ports use the [host]:port notation
+        if host.startswith("["):
+            host = host[1:].partition("]")[0]
+        hosts.append(host)
+    return hosts
+
+def enableConnectionReuse(driver):
     """
-    logging.basicConfig(format='%(asctime)s [%(levelname)s] [%(name)s(%(filename)s:%(lineno)d)] - %(message)s', level=logging.INFO)
+    Make the driver reuse its HTTP(S) connection across requests instead
+    of establishing a new connection, and TLS handshake, for every request.
+
+    Connections are kept per thread so that concurrent requests, see
+    :meth:`Bolt.mapRequests`, do not share the same underlying connection.
+    A new connection is established, and the previous one closed, whenever
+    the effective host, port, secure flag or base url changes or the server
+    dropped the connection, e.g., because of a keep-alive timeout.
+
+    Note that this replaces the class of ``driver.connection`` with a subclass
+    overriding ``connect`` and the ``connection`` attribute. This has been
+    checked against the :class:`~libcloud.common.base.Connection` implementation
+    of apache-libcloud 1.1.0 (the version storm-bolt depends on), where
+    ``request`` calls ``connect()`` without arguments before every request and
+    non-raw responses are read completely before ``request`` returns.
 
-    # load drivers
-    driverTypes = set([])
+    :param driver: driver
+    :type driver: :class:`~libcloud.compute.base.NodeDriver`
+    :returns: `True` if the driver uses per thread connections, `False` if
+        its connection cannot be reused and requests must not be concurrent
+    :rtype: bool
+    """
+    connection = getattr(driver, "connection", None)
+    if connection is None or not hasattr(connection, "connect"):
+        log.debug("Driver '%s' does not provide a reusable connection", getattr(driver, "type", driver))
+        return False
+    connectionClass = connection.__class__
+    if getattr(connectionClass, "perThreadConnections", False):
+        return True
+    threadLocal = threading.local()
+
+    def getConnection(self):
+        return getattr(threadLocal, "connection", None)
+
+    def setConnection(self, value):
+        threadLocal.connection = value
+
+    def connect(self, host=None, port=None, base_url=None, **kwargs):
+        # use the effective values at call time since libcloud calls connect() without arguments
+        key = (host or self.host,
+               port or self.port,
+               self.secure,
+               base_url or getattr(self, "base_url", None))
+        existingConnection = getConnection(self)
+        if (existingConnection is not None
+                and getattr(threadLocal, "key", None) == key
+                and not isConnectionDropped(existingConnection)):
+            return
+        if existingConnection is not None:
+            existingConnection.close()
+        connectionClass.connect(self, host=host, port=port, base_url=base_url, **kwargs)
+        threadLocal.key = key
+
+    connection.__class__ = type(connectionClass.__name__, (connectionClass,), {
+        "connect": connect,
+        "connection": property(getConnection, setConnection),
+        "perThreadConnections": True
+    })
+    return True
+
+def isConnectionDropped(connection):
+    """
+    Check if the HTTP(S) connection cannot be reused because its socket
+    has been closed by the server. Between requests the socket of a
+    reusable connection must not be readable, otherwise the server either
+    closed it or sent unexpected data.
+
+    :param connection: connection
+    :type connection: :class:`~httplib.HTTPConnection`
+    :returns: `True` if the connection was dropped, `False` otherwise
+    :rtype: bool
+    """
+    sock = getattr(connection, "sock", None)
+    if sock is None:
+        return True
     try:
-        import storm.drivers
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (ValueError, select.error, socket.error):
+        return True
+    return bool(readable)
+
+def findByName(items, names):
+    """
+    Find the items with the specified names. The search stops as soon
+    as all names have been found.
+
+    :param items: items with a ``name`` attribute
+    :type items: []
+    :param names: names
+    :type names: []
+    :returns: mapping of name to item for the items found
+    :rtype: dict
+    """
+    remainingNames = set(names)
+    itemsByName = {}
+    for item in items:
+        if not remainingNames:
+            break
+        if item.name in remainingNames:
+            itemsByName[item.name] = item
+            remainingNames.discard(item.name)
+    return itemsByName
+
+def formatTable(fieldNames, rows):
+    """
+    Format rows into a text table with the same layout as :class:`~prettytable.PrettyTable`.
+    Column widths are computed in a single pass over the rows.
+
+    :param fieldNames: column names
+    :type fieldNames: [str]
+    :param rows: rows with one value per column
+    :type rows: [[]]
+    :returns: formatted table
+    :rtype: str
+    """
+    cells = [
+        [u"{}".format(cell) for cell in row]
+        for row in rows
+    ]
+    widths = [len(name) for name in fieldNames]
+    for row in cells:
+        widths = [max(width, len(cell)) for width, cell in zip(widths, row)]
+
+    def formatRow(row):
+        return "| " + " | ".join(cell.center(width) for cell, width in zip(row, widths)) + " |"
+
+    separator = "+" + "+".join("-" * (width + 2) for width in widths) + "+"
+    lines = [separator, formatRow(fieldNames), separator]
+    lines.extend(formatRow(row) for row in cells)
+    lines.append(separator)
+    return "\n".join(lines)
+
+def printRows(fieldNames, rows, outputFormat="table"):
+    """
+    Print rows in the specified output format while consuming them, i.e.,
+    ``csv`` and ``json`` rows are written one at a time and tables are
+    printed in pages of :py:data:`TABLE_PAGE_SIZE` rows
+
+    :param fieldNames: column names
+    :type fieldNames: [str]
+    :param rows: rows with one value per column
+    :type rows: iterable
+    :param outputFormat: output format, either ``table``, ``csv`` or ``json``
+    :type outputFormat: str
+    """
+    if outputFormat == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow(fieldNames)
+        writer.writerows(rows)
+
+    elif outputFormat == "json":
+        # write a list of objects with one object per row
+        sys.stdout.write("[")
+        for index, row in enumerate(rows):
+            if index:
+                sys.stdout.write(",")
+            sys.stdout.write("\n    ")
+            sys.stdout.write(json.dumps(collections.OrderedDict(zip(fieldNames, row)), default=str))
+        sys.stdout.write("\n]\n")
+
+    else:
+        page = []
+        printed = False
+        for row in rows:
+            page.append(row)
+            if len(page) == TABLE_PAGE_SIZE:
+                print(formatTable(fieldNames, page))
+                page = []
+                printed = True
+        # make sure to print at least the header
+        if page or not printed:
+            print(formatTable(fieldNames, page))
+
+def discoverDriverModules():
+    """
+    Discover the available storm cloud drivers by importing all driver modules
+
+    :returns: mapping of driver type to the name of the module implementing it
+    :rtype: dict
+    """
+    try:
+        from libcloud.compute.base import NodeDriver
+        from c4.utils.util import getModuleClasses
+
+        drivers = importlib.import_module("storm.drivers")
         # note that getting the driver implementations implicitly triggers their registration with libcloud
-        driverTypes = set([
-            driver.type
-            for driver in getModuleClasses(storm.drivers, baseClass=NodeDriver)
-        ])
+        return {
+            driver.type: driver.__module__
+            for driver in getModuleClasses(drivers, baseClass=NodeDriver)
+        }
     except ImportError:
+        return {}
+
+def getDriverModules():
+    """
+    Get the available storm cloud drivers. Since discovering the drivers
+    requires importing all driver modules the result is cached in
+    :py:data:`DRIVERS_CACHE_FILE` and only refreshed when the driver
+    package changes. Drivers that are not installed as source files, e.g.,
+    in a zipped egg, are discovered without caching.
+
+    :returns: mapping of driver type to the name of the module implementing it
+    :rtype: dict
+    """
+    # drivers can be installed in multiple locations since storm is a namespace package
+    driversPaths = [
+        os.path.join(path, "drivers")
+        for path in storm.__path__
+        if os.path.isdir(os.path.join(path, "drivers"))
+    ]
+
+    # use path and modification time of all driver modules as cache key so
+    # that added, removed and modified modules all invalidate the cache
+    signature = sorted(
+        [os.path.join(directory, fileName), os.path.getmtime(os.path.join(directory, fileName))]
+        for driversPath in driversPaths
+        for directory, _, fileNames in os.walk(driversPath)
+        for fileName in fileNames
+        if fileName.endswith(".py")
+    )
+    if not signature:
+        return discoverDriverModules()
+
+    try:
+        with open(DRIVERS_CACHE_FILE) as cacheFile:
+            cache = json.load(cacheFile)
+        if cache["signature"] == signature:
+            return cache["drivers"]
+    except (IOError, KeyError, TypeError, ValueError):
         pass
-    if not driverTypes:
-        log.error("Could not find any storm cloud drivers. Please install at least one.")
-        return 1
+
+    driverModules = discoverDriverModules()
+    if not driverModules:
+        return driverModules
+
+    try:
+        if not os.path.isdir(os.path.dirname(DRIVERS_CACHE_FILE)):
+            os.makedirs(os.path.dirname(DRIVERS_CACHE_FILE))
+        with open(DRIVERS_CACHE_FILE, "w") as cacheFile:
+            json.dump({"signature": signature, "drivers": driverModules}, cacheFile)
+    except (IOError, OSError) as exception:
+        log.debug("Could not write drivers cache: %s", exception)
+
+    return driverModules
+
+def mapConcurrently(function, items):
+    """
+    Apply the function to each of the items using a pool of threads. This
+    is intended for independent I/O bound calls such as cloud API requests.
+
+    :param function: function
+    :type function: func
+    :param items: items
+    :type items: []
+    :returns: results in the order of the items
+    :rtype: []
+    """
+    if not items:
+        return []
+    pool = ThreadPool(min(MAX_WORKERS, len(items)))
+    try:
+        return pool.map(function, items)
+    finally:
+        pool.close()
+        pool.join()
+
+def setVerbosity(verbosity):
+    """
+    Set the levels of the relevant loggers based on the specified verbosity
+
+    :param verbosity: verbosity
+    :type verbosity: int
+    """
+    levels = VERBOSITY_LEVELS[min(verbosity, len(VERBOSITY_LEVELS) - 1)]
+    for loggerName, level in levels.items():
+        logging.getLogger(loggerName).setLevel(level)
+
+def main():
+    """
+    Main function of the cloud tooling setup
+    """
+    logging.basicConfig(format='%(asctime)s [%(levelname)s] [%(name)s(%(filename)s:%(lineno)d)] - %(message)s', level=logging.INFO)
 
     parentParser = argparse.ArgumentParser(add_help=False)
     parentParser.add_argument("-v", "--verbose", action="count", help="display debug information")
 
     parser = argparse.ArgumentParser(description="A utility to help with and automate cluster setup and configuration", parents=[parentParser])
-    parser.add_argument("driver", choices=driverTypes,
+    # note that the driver is validated after parsing to avoid loading drivers for help and usage errors
+    parser.add_argument("driver",
                         action="store", type=str, help="The name of the Storm driver to use")
     parser.add_argument("--driver-config", action="store", type=str, dest="driverConfig",
                         help="Path to the driver config file. Default is ~/.<driver>")
@@ -412,29 +1014,49 @@ def main():
     listParser = commandParser.add_parser("list", help="list")
     listTypeParser = listParser.add_subparsers(dest="type")
 
-    listTypeParser.add_parser("clusters", help="List clusters", parents=[parentParser])
+    listFormatParser = argparse.ArgumentParser(add_help=False)
+    listFormatParser.add_argument("--format", default="table", choices=["table", "csv", "json"], action="store",
+                                  help="Output format")
 
-    listTypeParser.add_parser("images", help="List images", parents=[parentParser])
+    listTypeParser.add_parser("clusters", help="List clusters", parents=[parentParser, listFormatParser])
 
-    listTypeParser.add_parser("locations", help="List locations", parents=[parentParser])
+    listTypeParser.add_parser("images", help="List images", parents=[parentParser, listFormatParser])
+
+    listTypeParser.add_parser("locations", help="List locations", parents=[parentParser, listFormatParser])
 
     listNodesParser = listTypeParser.add_parser("nodes", help="List nodes", parents=[parentParser])
     listNodesParser.add_argument("--passwords", action="store_true")
-    listNodesParser.add_argument("--format", default="table", choices=["table", "json"], action="store",
+    listNodesParser.add_argument("--format", default="table", choices=["table", "csv", "json"], action="store",
                                  help="Node information format")
     listNodesParser.add_argument("--filter", action="append", default=[], help="only show nodes that start with filter")
 
-    listSizesParser = listTypeParser.add_parser("sizes", help="List sizes", parents=[parentParser])
+    listSizesParser = listTypeParser.add_parser("sizes", help="List sizes", parents=[parentParser, listFormatParser])
     listSizesParser.add_argument("--extras", action="store_true")
 
     args = parser.parse_args()
 
+    # load drivers
+    driverModules = getDriverModules()
+    if not driverModules:
+        log.error("Could not find any storm cloud drivers. Please install at least one.")
+        return 1
+    if args.driver not in driverModules:
+        parser.error("argument driver: invalid choice: '{}' (choose from {})".format(
+            args.driver, ", ".join("'{}'".format(driverType) for driverType in sorted(driverModules))))
+
     # TODO: move into fyre driver
-    # disable HTTPS certificate warnings
-    import requests.packages.urllib3
-    requests.packages.urllib3.disable_warnings()
+    # disable HTTPS certificate warnings, note that requests is not a
+    # dependency of storm-bolt itself so only do this if it is available
+    try:
+        import requests.packages.urllib3
+        requests.packages.urllib3.disable_warnings()
+    except ImportError:
+        pass
 
+    from libcloud.compute.providers import get_driver
     try:
+        # note that importing the driver module implicitly triggers its registration with libcloud
+        importlib.import_module(driverModules[args.driver])
         cls = get_driver(args.driver)
         if args.driverConfig:
             driver = cls.ex_from_config(configFileName=args.driverConfig)
@@ -446,32 +1068,16 @@ def main():
 
     bolt = Bolt(driver)
 
-    logging.root.setLevel(logging.ERROR)
-    logging.getLogger("storm").setLevel(logging.INFO)
-    logging.getLogger("storm.thunder.client.AdvancedSSHClient").setLevel(logging.INFO)
-    logging.getLogger("c4.utils").setLevel(logging.INFO)
-    logging.getLogger("paramiko").setLevel(logging.ERROR)
-    logging.getLogger("requests").setLevel(logging.ERROR)
-
-    if args.verbose > 0:
-        logging.getLogger("storm").setLevel(logging.DEBUG)
-        logging.getLogger("storm.thunder.client.AdvancedSSHClient").setLevel(logging.INFO)
-        logging.getLogger("c4.utils").setLevel(logging.INFO)
-    if args.verbose > 1:
-        logging.getLogger("storm.thunder.client.AdvancedSSHClient").setLevel(logging.DEBUG)
-        logging.getLogger("c4.utils").setLevel(logging.DEBUG)
-    if args.verbose > 2:
-        logging.root.setLevel(logging.INFO)
-    if args.verbose > 3:
-        logging.root.setLevel(logging.DEBUG)
-        logging.getLogger("paramiko").setLevel(logging.INFO)
-        logging.getLogger("requests").setLevel(logging.INFO)
-    if args.verbose > 4:
-        logging.getLogger("paramiko").setLevel(logging.DEBUG)
-        logging.getLogger("requests").setLevel(logging.DEBUG)
+    setVerbosity(args.verbose or 0)
 
     if args.command == "create":
 
+        from storm.thunder import (NodesInfoMap,
+                                   deploy)
+        from storm.thunder.manager import getDeploymentSections
+
+        from .configuration import ConfigurationInfo
+
         if args.config:
             try:
                 config = args.config.read()
@@ -517,19 +1123,19 @@ def main():
     elif args.command == "list":
 
         if args.type == "clusters":
-            bolt.listClusters()
+            bolt.listClusters(outputFormat=args.format)
 
         elif args.type == "images":
-            bolt.listImages()
+            bolt.listImages(outputFormat=args.format)
 
         elif args.type == "locations":
-            bolt.listLocations()
+            bolt.listLocations(outputFormat=args.format)
 
         elif args.type == "nodes":
             bolt.listNodes(includePasswords=args.passwords, nodeFilter=args.filter, outputFormat=args.format)
 
         elif args.type == "sizes":
-            bolt.listSizes(args.extras)
+            bolt.listSizes(includeExtras=args.extras, outputFormat=args.format)
 
         else:
             raise NotImplementedError
@@ -0,0 +1,39 @@
+"""
+Copyright (c) IBM 2015-2017. All Rights Reserved.
+Project name: storm-bolt
+This project is licensed under the MIT License, see LICENSE
+"""
+import pytest
+
+from storm.bolt.configuration import (ConfigurationInfo,
+                                      findDeploymentsSection)
+
+
+def test_findDeploymentsSection():
+
+    assert findDeploymentsSection("deployments: []") == 0
+    assert findDeploymentsSection("cluster {}\ndeployments: []") == 11
+    assert findDeploymentsSection("cluster {}\ndeployments : []") == 11
+    assert findDeploymentsSection("cluster {}\ndeployments\n: []") == 11
+    assert findDeploymentsSection("cluster {}") == -1
+
+def test_findDeploymentsSectionKeyMismatch():
+
+    # only the exact key at the start of a line is a deployments section
+    assert findDeploymentsSection("deploymentsX: []") == -1
+    assert findDeploymentsSection("cluster {}\ndeploymentsX: []") == -1
+    assert findDeploymentsSection("cluster {\n  deployments: []\n}") == -1
+    assert findDeploymentsSection("cluster {}\nmydeployments: []") == -1
+    assert findDeploymentsSection("cluster {}\ndeployments") == -1
+    assert findDeploymentsSection("cluster {}\ndeploymentsX: []\ndeployments: []") == 28
+
+def test_findDeploymentsSectionStart():
+
+    hjsonString = "deployments: []\ndeployments: []"
+    assert findDeploymentsSection(hjsonString, 1) == 16
+    assert findDeploymentsSection(hjsonString, 17) == -1
+
+def test_fromHjsonMultipleDeploymentsSections():
+
+    with pytest.raises(ValueError):
+        ConfigurationInfo.fromHjson("cluster {}\ndeployments: []\ndeployments: []")
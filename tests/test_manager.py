@@ -0,0 +1,176 @@
+"""
+Copyright (c) IBM 2015-2017. All Rights Reserved.
+Project name: storm-bolt
+This project is licensed under the MIT License, see LICENSE
+"""
+import os
+import stat
+import threading
+import time
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+
+from libcloud.common.base import Connection
+import pytest
+
+from storm.bolt.manager import (Bolt,
+                                cleanupKnownHosts,
+                                enableConnectionReuse,
+                                getKnownHostsEntryHosts)
+
+
+class KeepAliveRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP/1.1 request handler that closes idle keep-alive connections
+    after a short timeout
+    """
+    protocol_version = "HTTP/1.1"
+    timeout = 0.2
+
+    def do_GET(self):
+        self.server.clientPorts.append(self.client_address[1])
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+@pytest.fixture
+def httpServer():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveRequestHandler)
+    server.clientPorts = []
+    serverThread = threading.Thread(target=server.serve_forever)
+    serverThread.daemon = True
+    serverThread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def knownHostsFileName(tmpdir, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmpdir))
+    tmpdir.mkdir(".ssh")
+    return os.path.join(str(tmpdir), ".ssh", "known_hosts")
+
+class Driver(object):
+
+    def __init__(self, connection):
+        self.connection = connection
+
+def test_enableConnectionReuse(httpServer):
+
+    connection = Connection(secure=False, host="127.0.0.1", port=httpServer.server_address[1])
+    enableConnectionReuse(Driver(connection))
+
+    assert connection.request("/").status == 200
+    assert connection.request("/").status == 200
+    # same client socket for back to back requests
+    assert len(set(httpServer.clientPorts)) == 1
+
+def test_enableConnectionReuseIdleTimeout(httpServer):
+
+    connection = Connection(secure=False, host="127.0.0.1", port=httpServer.server_address[1])
+    enableConnectionReuse(Driver(connection))
+
+    assert connection.request("/").status == 200
+    # wait until the server closed the idle connection
+    time.sleep(1)
+    assert connection.request("/").status == 200
+    assert len(set(httpServer.clientPorts)) == 2
+
+def test_enableConnectionReuseTwice(httpServer):
+
+    connection = Connection(secure=False, host="127.0.0.1", port=httpServer.server_address[1])
+    assert enableConnectionReuse(Driver(connection))
+    connectionClass = connection.__class__
+    assert enableConnectionReuse(Driver(connection))
+    assert connection.__class__ is connectionClass
+
+def test_destroyNodeWithoutConnection():
+
+    class NodeDriver(object):
+
+        def __init__(self):
+            self.threads = set()
+
+        def destroy_node(self, node):
+            self.threads.add(threading.current_thread())
+            return True
+
+    class Node(object):
+
+        def __init__(self, name):
+            self.name = name
+
+    driver = NodeDriver()
+    bolt = Bolt(driver)
+    assert not bolt.concurrentRequests
+
+    nodes = {name: Node(name) for name in ["node1", "node2", "node3"]}
+    bolt.getNodesByName = lambda *names: nodes
+    assert bolt.destroyNode(*nodes.keys())
+    # requests are not issued concurrently without per thread connections
+    assert driver.threads == {threading.current_thread()}
+
+def test_getKnownHostsEntryHosts():
+
+    assert getKnownHostsEntryHosts("10.0.0.1 ssh-rsa AAAA\n") == ["10.0.0.1"]
+    assert getKnownHostsEntryHosts("node1,10.0.0.1 ssh-rsa AAAA\n") == ["node1", "10.0.0.1"]
+    assert getKnownHostsEntryHosts("[10.0.0.1]:2222,[node1]:2222 ssh-rsa AAAA\n") == ["10.0.0.1", "node1"]
+    assert getKnownHostsEntryHosts("@cert-authority *.example.com ssh-rsa AAAA\n") == ["*.example.com"]
+    assert getKnownHostsEntryHosts("@revoked 10.0.0.1 ssh-rsa AAAA\n") == ["10.0.0.1"]
+    assert getKnownHostsEntryHosts("\n") == []
+
+def test_cleanupKnownHosts(knownHostsFileName):
+
+    with open(knownHostsFileName, "w") as knownHostsFile:
+        knownHostsFile.write("10.0.0.1 ssh-rsa AAAA\n"
+                             "10.0.0.10 ssh-rsa BBBB\n"
+                             "node2,10.0.0.2 ssh-rsa CCCC\n"
+                             "[10.0.0.3]:2222 ssh-rsa DDDD\n"
+                             "@cert-authority 10.0.0.4 ssh-rsa EEEE\n"
+                             "\n"
+                             "10.0.0.5 ssh-rsa FFFF")
+
+    cleanupKnownHosts({"10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4"})
+
+    with open(knownHostsFileName) as knownHostsFile:
+        # addresses sharing a prefix with removed ones are kept
+        assert knownHostsFile.read() == ("10.0.0.10 ssh-rsa BBBB\n"
+                                         "10.0.0.5 ssh-rsa FFFF\n")
+
+def test_cleanupKnownHostsFileMode(knownHostsFileName):
+
+    with open(knownHostsFileName, "w") as knownHostsFile:
+        knownHostsFile.write("10.0.0.1 ssh-rsa AAAA\n")
+    os.chmod(knownHostsFileName, 0o644)
+
+    cleanupKnownHosts({"10.0.0.1"})
+
+    assert stat.S_IMODE(os.stat(knownHostsFileName).st_mode) == 0o644
+
+def test_cleanupKnownHostsSymlink(knownHostsFileName, tmpdir):
+
+    targetFileName = str(tmpdir.join("known_hosts_target"))
+    with open(targetFileName, "w") as targetFile:
+        targetFile.write("10.0.0.1 ssh-rsa AAAA\n"
+                         "10.0.0.2 ssh-rsa BBBB\n")
+    os.symlink(targetFileName, knownHostsFileName)
+
+    cleanupKnownHosts({"10.0.0.1"})
+
+    # the link is kept and its target rewritten
+    assert os.path.islink(knownHostsFileName)
+    assert os.path.realpath(knownHostsFileName) == os.path.realpath(targetFileName)
+    with open(targetFileName) as targetFile:
+        assert targetFile.read() == "10.0.0.2 ssh-rsa BBBB\n"